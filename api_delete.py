@@ -1,14 +1,24 @@
-import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.cloud import storage
-from typing import Tuple, List
+from google.api_core.exceptions import GoogleAPICallError, NotFound, from_http_response
+from typing import Iterator, Tuple, List
 import logging
+from gcs_util import GCS_RETRY, gcs_join, size_connection_pool
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of calls allowed in a single GCS JSON API batch request
+BATCH_SIZE = 100
+
+# Concurrent deletes, kept well below the ~1000 writes/s per-bucket limit
+MAX_DELETE_WORKERS = 64
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    """Yield successive slices of at most `size` items"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger('CloudStorageDelete')
 
 class CloudStorageDelete:
     """Class to handle file deletions from Google Cloud Storage"""
@@ -22,9 +32,11 @@ class CloudStorageDelete:
             base_path (str): Base path in the bucket for file storage
         """
         self.storage_client = storage.Client()
+        size_connection_pool(self.storage_client, MAX_DELETE_WORKERS)
         self.bucket_name = bucket_name
+        self.bucket = self.storage_client.bucket(bucket_name)
         self.base_path = base_path
-        logger.info(f"Initialized CloudStorageDelete for bucket: {bucket_name}")
+        logger.info("Initialized CloudStorageDelete for bucket: %s", bucket_name)
     
     def delete_file(self, file_path: str) -> Tuple[bool, str]:
         """
@@ -37,22 +49,19 @@ class CloudStorageDelete:
             Tuple[bool, str]: (Success status, Message/Error description)
         """
         try:
-            # Get bucket and blob
-            bucket = self.storage_client.bucket(self.bucket_name)
-            blob = bucket.blob(file_path)
+            # Get blob
+            blob = self.bucket.blob(file_path)
             
-            # Check if file exists
-            if not blob.exists():
-                msg = f"File {file_path} does not exist"
-                logger.warning(msg)
-                return False, msg
-            
-            # Delete the file
-            blob.delete()
+            # Delete the file directly; a missing object surfaces as NotFound
+            blob.delete(retry=GCS_RETRY)
             
-            logger.info(f"Successfully deleted file: {file_path}")
+            logger.info("Successfully deleted file: %s", file_path)
             return True, f"File {file_path} deleted successfully"
             
+        except NotFound:
+            msg = f"File {file_path} does not exist"
+            logger.warning(msg)
+            return False, msg
         except Exception as e:
             error_msg = f"Error deleting file {file_path}: {str(e)}"
             logger.error(error_msg)
@@ -62,6 +71,9 @@ class CloudStorageDelete:
         """
         Delete multiple files from Google Cloud Storage
         
+        Deletions are sent as GCS batch requests of up to BATCH_SIZE calls
+        each, so N files cost roughly N / BATCH_SIZE HTTP round-trips.
+        
         Args:
             file_paths (List[str]): List of file paths to delete
             
@@ -69,16 +81,89 @@ class CloudStorageDelete:
             List[Tuple[str, bool, str]]: List of (file_path, success_status, message)
         """
         results = []
-        for file_path in file_paths:
-            success, message = self.delete_file(file_path)
-            results.append((file_path, success, message))
+        for chunk in _chunks(file_paths, BATCH_SIZE):
+            results.extend(self._delete_batch(chunk))
         
         # Log summary
         successful = len([r for r in results if r[1]])
-        logger.info(f"Deleted {successful} out of {len(file_paths)} files")
+        logger.info("Deleted %d out of %d files", successful, len(file_paths))
         
         return results
     
+    def _delete_batch(self, file_paths: List[str]) -> List[Tuple[str, bool, str]]:
+        """
+        Delete a chunk of files using a single GCS batch request
+        
+        Args:
+            file_paths (List[str]): At most BATCH_SIZE file paths
+            
+        Returns:
+            List[Tuple[str, bool, str]]: List of (file_path, success_status, message)
+        """
+        try:
+            # Collect per-call responses instead of failing the whole batch
+            batch = self.storage_client.batch(raise_exception=False)
+        except TypeError as e:
+            # Client predates batch(raise_exception=...)
+            logger.warning("Batch delete unsupported, deleting files individually: %s", e)
+            return self._delete_individually(file_paths)
+        
+        try:
+            # Queue the deletes on the batch, then send it explicitly so the
+            # per-call responses come from finish() rather than batch internals
+            self.storage_client._push_batch(batch)
+            try:
+                for file_path in file_paths:
+                    self.bucket.blob(file_path).delete()
+            finally:
+                self.storage_client._pop_batch()
+            responses = batch.finish(raise_exception=False)
+        except GoogleAPICallError as e:
+            # The batch request itself was rejected, so nothing was deleted
+            logger.warning("Batch delete failed, deleting files individually: %s", e)
+            return self._delete_individually(file_paths)
+        except Exception as e:
+            # The batch may already have run server-side; deleting again would
+            # misreport removed files as missing
+            error_msg = f"Error deleting files in batch: {str(e)}"
+            logger.error(error_msg)
+            return [(file_path, False, error_msg) for file_path in file_paths]
+        
+        results = []
+        for file_path, response in zip(file_paths, responses):
+            if 200 <= response.status_code < 300:
+                logger.info("Successfully deleted file: %s", file_path)
+                results.append((file_path, True, f"File {file_path} deleted successfully"))
+                continue
+            
+            error = from_http_response(response)
+            if isinstance(error, NotFound):
+                msg = f"File {file_path} does not exist"
+                logger.warning(msg)
+                results.append((file_path, False, msg))
+            else:
+                error_msg = f"Error deleting file {file_path}: {str(error)}"
+                logger.error(error_msg)
+                results.append((file_path, False, error_msg))
+        return results
+    
+    def _delete_individually(self, file_paths: List[str]) -> List[Tuple[str, bool, str]]:
+        """
+        Delete files with concurrent single requests
+        
+        Args:
+            file_paths (List[str]): List of file paths to delete
+            
+        Returns:
+            List[Tuple[str, bool, str]]: List of (file_path, success_status, message)
+        """
+        with ThreadPoolExecutor(max_workers=min(MAX_DELETE_WORKERS, len(file_paths))) as executor:
+            outcomes = list(executor.map(self.delete_file, file_paths))
+        return [
+            (file_path, success, message)
+            for file_path, (success, message) in zip(file_paths, outcomes)
+        ]
+    
     def delete_by_prefix(self, prefix: str) -> Tuple[bool, str]:
         """
         Delete all files with a specific prefix
@@ -90,17 +175,31 @@ class CloudStorageDelete:
             Tuple[bool, str]: (Success status, Message/Error description)
         """
         try:
-            # Get bucket
-            bucket = self.storage_client.bucket(self.bucket_name)
-            
             # List all blobs with prefix
-            blobs = bucket.list_blobs(prefix=os.path.join(self.base_path, prefix))
+            blobs = self.bucket.list_blobs(
+                prefix=gcs_join(self.base_path, prefix),
+                retry=GCS_RETRY
+            )
             
-            # Delete all matching blobs
+            # Delete all matching blobs concurrently, one listing page at a
+            # time so pending futures stay bounded by the page size
             count = 0
-            for blob in blobs:
-                blob.delete()
-                count += 1
+            failed = 0
+            with ThreadPoolExecutor(max_workers=MAX_DELETE_WORKERS) as executor:
+                for page in blobs.pages:
+                    futures = {executor.submit(blob.delete, retry=GCS_RETRY): blob.name for blob in page}
+                    for future in as_completed(futures):
+                        try:
+                            future.result()
+                            count += 1
+                        except Exception as e:
+                            failed += 1
+                            logger.error("Error deleting file %s: %s", futures[future], e)
+            
+            if failed:
+                error_msg = f"Deleted {count} files with prefix {prefix}, {failed} failed"
+                logger.error(error_msg)
+                return False, error_msg
             
             msg = f"Successfully deleted {count} files with prefix {prefix}"
             logger.info(msg)
@@ -1,15 +1,15 @@
-import os
 from google.cloud import storage
+from google.api_core.exceptions import PreconditionFailed
 from typing import Optional, Tuple
 import logging
 from datetime import datetime
+from mimetypes_util import get_mime_type
+from gcs_util import GCS_RETRY, gcs_join
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger('CloudStorageUpload')
+logger = logging.getLogger(__name__)
+
+# Resumable upload chunk size; GCS requires a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
 
 class CloudStorageUpload:
     """Class to handle file uploads to Google Cloud Storage"""
@@ -24,8 +24,9 @@ class CloudStorageUpload:
         """
         self.storage_client = storage.Client()
         self.bucket_name = bucket_name
+        self.bucket = self.storage_client.bucket(bucket_name)
         self.base_path = base_path
-        logger.info(f"Initialized CloudStorageUpload for bucket: {bucket_name}")
+        logger.info("Initialized CloudStorageUpload for bucket: %s", bucket_name)
         
     def upload_file(self, file_obj, custom_filename: Optional[str] = None) -> Tuple[bool, str]:
         """
@@ -39,26 +40,38 @@ class CloudStorageUpload:
             Tuple[bool, str]: (Success status, Message/Error description)
         """
         try:
-            # Get bucket
-            bucket = self.storage_client.bucket(self.bucket_name)
-            
             # Generate filename if not provided
             if not custom_filename:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 custom_filename = f"{timestamp}_{file_obj.name}"
             
             # Create full path
-            destination_blob_path = os.path.join(self.base_path, custom_filename)
+            destination_blob_path = gcs_join(self.base_path, custom_filename)
             
             # Create blob and upload
-            blob = bucket.blob(destination_blob_path)
+            blob = self.bucket.blob(destination_blob_path)
+            
+            # Passing size lets the library send files up to its 8 MiB multipart
+            # limit as a single request; chunk_size only sets the chunk length
+            # of the resumable upload used for larger files
+            blob.chunk_size = UPLOAD_CHUNK_SIZE
             
-            # Upload the file
-            blob.upload_from_file(file_obj, content_type=self._get_content_type(file_obj.name))
+            # Upload the file, refusing to overwrite an existing object
+            blob.upload_from_file(
+                file_obj,
+                size=getattr(file_obj, 'size', None),
+                content_type=self._get_content_type(file_obj.name),
+                if_generation_match=0,
+                retry=GCS_RETRY
+            )
             
-            logger.info(f"Successfully uploaded file to {destination_blob_path}")
+            logger.info("Successfully uploaded file to %s", destination_blob_path)
             return True, f"File uploaded successfully to {destination_blob_path}"
             
+        except PreconditionFailed:
+            error_msg = f"File {destination_blob_path} already exists"
+            logger.error(error_msg)
+            return False, error_msg
         except Exception as e:
             error_msg = f"Error uploading file: {str(e)}"
             logger.error(error_msg)
@@ -74,14 +87,4 @@ class CloudStorageUpload:
         Returns:
             str: MIME type
         """
-        extension = filename.lower().split('.')[-1]
-        mime_types = {
-            'pdf': 'application/pdf',
-            'txt': 'text/plain',
-            'csv': 'text/csv',
-            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'xls': 'application/vnd.ms-excel',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        }
-        return mime_types.get(extension, 'application/octet-stream')
+        return get_mime_type(filename)
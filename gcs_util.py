@@ -0,0 +1,38 @@
+from google.cloud.storage.retry import DEFAULT_RETRY
+from requests.adapters import HTTPAdapter
+
+# Exponential backoff with jitter for GCS calls, so 429/503 responses under
+# concurrent load are retried instead of surfacing as user-visible errors
+GCS_RETRY = DEFAULT_RETRY.with_delay(initial=1.0, maximum=10.0, multiplier=2.0).with_deadline(30.0)
+
+
+def gcs_join(base_path: str, name: str) -> str:
+    """
+    Join a base path and an object name into a GCS object path
+    
+    GCS object names always use '/', unlike os.path.join on Windows.
+    
+    Args:
+        base_path (str): Base path in the bucket, may be empty
+        name (str): Object name or sub-path relative to base_path
+        
+    Returns:
+        str: Combined object path
+    """
+    base_path = base_path.rstrip('/')
+    name = name.lstrip('/')
+    return f"{base_path}/{name}" if base_path else name
+
+
+def size_connection_pool(client, maxsize: int) -> None:
+    """
+    Let a storage client keep enough HTTPS connections open for its workers
+    
+    The client's requests session only pools 10 connections by default, so
+    extra concurrent workers would open and discard a connection per call.
+    
+    Args:
+        client (storage.Client): Client whose session is shared by the workers
+        maxsize (int): Number of concurrent workers using the client
+    """
+    client._http.mount('https://', HTTPAdapter(pool_maxsize=maxsize))
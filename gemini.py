@@ -1,26 +1,36 @@
 import os
+import io
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import google.generativeai as genai
-from typing import Optional, List, Dict
+from typing import Hashable, Optional, List, Dict, Tuple
 from dotenv import load_dotenv
-import tempfile
 from google.cloud import storage
-import base64
+from google.cloud.storage import transfer_manager
 import logging
 import streamlit as st
+from mimetypes_util import get_mime_type
+from gcs_util import GCS_RETRY, size_connection_pool
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger('GeminiAPI')
+logger = logging.getLogger(__name__)
+
+# Maximum objects per list_blobs page allowed by the JSON API
+LIST_PAGE_SIZE = 1000
+
+# Upper bound on concurrent GCS requests per query
+MAX_DOWNLOAD_WORKERS = 16
+
+# Re-upload cached Gemini files this long before the Files API expires them
+UPLOAD_EXPIRY_MARGIN = timedelta(minutes=10)
+
+# Maximum Gemini file handles kept per cache, least recently used evicted first
+FILE_CACHE_SIZE = 128
 
 # Load environment variables (for local development)
 load_dotenv()
 
-# Configure the Gemini API using Streamlit secrets or environment variables
-genai.configure(api_key=st.secrets.get("gemini_api_key", os.getenv('GEMINI_API_KEY')))
-
 class GeminiAPI:
     """Utility class for interacting with Gemini API"""
     
@@ -46,16 +56,23 @@ class GeminiAPI:
             # else:
             # Use default credentials from credentials.json
             self.storage_client = storage.Client()
+            size_connection_pool(self.storage_client, MAX_DOWNLOAD_WORKERS)
             
             self.bucket_name = os.getenv('GOOGLE_CLOUD_STORAGE_BUCKET') or st.secrets.get("gcp_bucket")
             if not self.bucket_name:
                 raise ValueError("GCP bucket name not found")
-                
+            self.bucket = self.storage_client.bucket(self.bucket_name)
+            
             self.base_path = 'Codes/Testing - Phase 1/MD Community Solar IX'
-            logger.info(f"Connected to GCS bucket: {self.bucket_name}")
+            
+            # Gemini Files API handles keyed by sha256 of the uploaded content
+            self._uploaded_files: 'OrderedDict[str, genai.types.File]' = OrderedDict()
+            # Same handles keyed by (GCS path, object generation)
+            self._file_cache: 'OrderedDict[Tuple[str, int], genai.types.File]' = OrderedDict()
+            logger.info("Connected to GCS bucket: %s", self.bucket_name)
             
         except Exception as e:
-            logger.error(f"Error initializing GeminiAPI: {str(e)}")
+            logger.error("Error initializing GeminiAPI: %s", e)
             raise
         
     def list_available_files(self) -> List[Dict[str, str]]:
@@ -65,9 +82,15 @@ class GeminiAPI:
         Returns:
             List[Dict[str, str]]: List of files with their names and full paths
         """
-        logger.info(f"Listing files from path: {self.base_path}")
-        bucket = self.storage_client.bucket(self.bucket_name)
-        files = bucket.list_blobs(prefix=self.base_path)
+        logger.info("Listing files from path: %s", self.base_path)
+        # Only name and size are used, so request just those fields,
+        # in the largest pages the API serves
+        files = self.bucket.list_blobs(
+            prefix=self.base_path,
+            page_size=LIST_PAGE_SIZE,
+            fields='items(name,size),nextPageToken',
+            retry=GCS_RETRY
+        )
         
         file_list = [
             {
@@ -78,7 +101,7 @@ class GeminiAPI:
             for blob in files
             if not blob.name.endswith('/')  # Skip directories
         ]
-        logger.info(f"Found {len(file_list)} files")
+        logger.info("Found %d files", len(file_list))
         return file_list
         
     def read_gcs_file(self, file_path: str) -> bytes:
@@ -91,17 +114,30 @@ class GeminiAPI:
         Returns:
             bytes: File content
         """
-        logger.info(f"Reading file: {file_path}")
+        logger.info("Reading file: %s", file_path)
         try:
-            bucket = self.storage_client.bucket(self.bucket_name)
-            blob = bucket.blob(file_path)
-            content = blob.download_as_bytes()
-            logger.info(f"Successfully read {len(content)} bytes")
+            blob = self.bucket.blob(file_path)
+            content = blob.download_as_bytes(retry=GCS_RETRY)
+            logger.info("Successfully read %d bytes", len(content))
             return content
         except Exception as e:
-            logger.error(f"Error reading file {file_path}: {str(e)}")
+            logger.error("Error reading file %s: %s", file_path, e)
             raise
     
+    def _get_generation(self, file_path: str) -> int:
+        """
+        Fetch the current generation of a GCS object without downloading it
+        
+        Args:
+            file_path (str): Full path to the file in GCS
+            
+        Returns:
+            int: Object generation
+        """
+        blob = self.bucket.blob(file_path)
+        blob.reload(retry=GCS_RETRY)
+        return blob.generation
+    
     def process_files_query(self, query: str, selected_files: List[str]) -> str:
         """
         Process a query about selected files using Gemini's capabilities
@@ -113,35 +149,47 @@ class GeminiAPI:
         Returns:
             str: Generated response about the files' content
         """
-        logger.info(f"Processing query for {len(selected_files)} files")
+        logger.info("Processing query for %d files", len(selected_files))
         try:
-            contents = []
+            # Look up current generations; map() preserves the selection order
+            workers = max(1, min(MAX_DOWNLOAD_WORKERS, len(selected_files)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                keys = list(zip(selected_files, executor.map(self._get_generation, selected_files)))
             
-            # Add each file as content with user role
-            for file_path in selected_files:
-                logger.debug(f"Processing file: {file_path}")
-                file_content = self.read_gcs_file(file_path)
-                file_type = self._get_file_type(file_path)
+            # Reuse live uploads for files whose generation has not changed
+            handles = {}
+            for key in keys:
+                cached = self._cache_get(self._file_cache, key)
+                if cached is not None:
+                    handles[key] = cached
+            
+            # Download only the remaining files
+            buffers = {key: io.BytesIO() for key in keys if key not in handles}
+            if buffers:
+                logger.info("Downloading %d of %d files", len(buffers), len(keys))
+                transfer_manager.download_many(
+                    [
+                        (self.bucket.blob(file_path, generation=generation), buffer)
+                        for (file_path, generation), buffer in buffers.items()
+                    ],
+                    download_kwargs={'retry': GCS_RETRY},
+                    worker_type=transfer_manager.THREAD,
+                    max_workers=workers,
+                    raise_exception=True
+                )
                 
-                # Format according to Gemini API requirements
-                file_part = {
-                    'role': 'user',
-                    'parts': [{
-                        'inline_data': {
-                            'mime_type': file_type,
-                            'data': base64.b64encode(file_content).decode('utf-8')
-                        }
-                    }]
-                }
-                contents.append(file_part)
+                # Upload on the script thread: the Files API client sends every
+                # upload through one shared httplib2.Http, which is not thread-safe
+                # Popping each buffer frees it before the next upload and
+                # before the generate_content round-trip
+                for key in list(buffers):
+                    handles[key] = self._upload_to_gemini(key[0], buffers.pop(key))
+                    self._cache_put(self._file_cache, key, handles[key])
             
-            # Add the query as a text part with user role
-            contents.append({
-                'role': 'user',
-                'parts': [{
-                    'text': query
-                }]
-            })
+            # Reference each file through the Files API in selection order,
+            # followed by the query
+            contents = [handles[key] for key in keys]
+            contents.append(query)
             
             logger.info("Generating response from Gemini API")
             # Generate content using the model
@@ -157,9 +205,87 @@ class GeminiAPI:
             return response.text
                 
         except Exception as e:
-            logger.error(f"Error processing files: {str(e)}")
+            logger.error("Error processing files: %s", e)
             return f"Error processing files: {str(e)}"
     
+    def _upload_to_gemini(self, file_path: str, file_content: io.BytesIO) -> genai.types.File:
+        """
+        Upload file content to the Gemini Files API, reusing earlier uploads
+        of identical content while they are still live
+        
+        Args:
+            file_path (str): Full path to the file in GCS
+            file_content (io.BytesIO): Buffer holding the file content
+            
+        Returns:
+            File: Gemini file handle usable as a generate_content part
+        """
+        digest = hashlib.sha256(file_content.getbuffer()).hexdigest()
+        cached = self._cache_get(self._uploaded_files, digest)
+        if cached is not None:
+            logger.debug("Reusing uploaded file for %s: %s", file_path, cached.name)
+            return cached
+        
+        file_content.seek(0)
+        uploaded = genai.upload_file(
+            file_content,
+            mime_type=self._get_file_type(file_path),
+            display_name=file_path.split('/')[-1]
+        )
+        self._cache_put(self._uploaded_files, digest, uploaded)
+        logger.info("Uploaded %s to Gemini as %s", file_path, uploaded.name)
+        return uploaded
+    
+    def _is_live(self, uploaded: Optional[genai.types.File]) -> bool:
+        """
+        Check whether a cached Gemini file handle can still be referenced
+        
+        Args:
+            uploaded (Optional[File]): Cached file handle, if any
+            
+        Returns:
+            bool: True if the handle exists and is not about to expire
+        """
+        return (
+            uploaded is not None
+            and uploaded.expiration_time > datetime.now(timezone.utc) + UPLOAD_EXPIRY_MARGIN
+        )
+    
+    def _cache_get(self, cache: 'OrderedDict[Hashable, genai.types.File]', key: Hashable) -> Optional[genai.types.File]:
+        """
+        Look up a live Gemini file handle, evicting the entry if it has expired
+        
+        Args:
+            cache (OrderedDict): Handle cache to read from
+            key (Hashable): Cache key
+            
+        Returns:
+            Optional[File]: The cached handle, or None if missing or expired
+        """
+        uploaded = cache.get(key)
+        if uploaded is None:
+            return None
+        if not self._is_live(uploaded):
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return uploaded
+    
+    def _cache_put(self, cache: 'OrderedDict[Hashable, genai.types.File]', key: Hashable, uploaded: genai.types.File) -> None:
+        """
+        Store a Gemini file handle, dropping the least recently used entries
+        beyond FILE_CACHE_SIZE
+        
+        Args:
+            cache (OrderedDict): Handle cache to write to
+            key (Hashable): Cache key
+            uploaded (File): Handle to store
+        """
+        cache[key] = uploaded
+        cache.move_to_end(key)
+        while len(cache) > FILE_CACHE_SIZE:
+            cache.popitem(last=False)
+    
     def _get_file_type(self, file_path: str) -> str:
         """
         Get the MIME type for a file based on its extension
@@ -170,18 +296,8 @@ class GeminiAPI:
         Returns:
             str: MIME type
         """
-        extension = file_path.lower().split('.')[-1]
-        mime_types = {
-            'pdf': 'application/pdf',
-            'txt': 'text/plain',
-            'csv': 'text/csv',
-            'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'xls': 'application/vnd.ms-excel',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-        }
-        mime_type = mime_types.get(extension, 'application/octet-stream')
-        logger.debug(f"File type for {file_path}: {mime_type}")
+        mime_type = get_mime_type(file_path)
+        logger.debug("File type for %s: %s", file_path, mime_type)
         return mime_type
     
     def generate_response(self, prompt: str, temperature: float = 0.1) -> str:
@@ -219,36 +335,24 @@ class GeminiAPI:
             str: Generated response about the PDF content
         """
         try:
-            # Create a temporary file to store the PDF
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
-                temp_pdf.write(pdf_content)
-                temp_pdf.flush()
-                
-                # Create the file data part for the model
-                file_data = {
-                    'fileData': {
-                        'mimeType': 'application/pdf',
-                        'data': pdf_content,
-                    }
+            # Pass the raw bytes; the SDK base64-encodes them once on the wire
+            file_data = genai.protos.Part(
+                inline_data=genai.protos.Blob(mime_type='application/pdf', data=pdf_content)
+            )
+            
+            # Generate content using the model
+            response = self.model.generate_content(
+                contents=[file_data, query],
+                generation_config={
+                    'temperature': 0.1,
+                    'max_output_tokens': 4000,
                 }
-                
-                # Generate content using the model
-                response = self.model.generate_content(
-                    contents=[file_data, query],
-                    generation_config={
-                        'temperature': 0.1,
-                        'max_output_tokens': 4000,
-                    }
-                )
-                
-                return response.text
+            )
+            
+            return response.text
                 
         except Exception as e:
             return f"Error processing PDF: {str(e)}"
-        finally:
-            # Clean up the temporary file
-            if 'temp_pdf' in locals():
-                os.unlink(temp_pdf.name)
     
     def start_chat(self, history: Optional[List[dict]] = None) -> genai.ChatSession:
         """
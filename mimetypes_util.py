@@ -0,0 +1,28 @@
+from types import MappingProxyType
+from typing import Mapping
+
+# MIME types for the document formats the app accepts, keyed by extension
+MIME_TYPES: Mapping[str, str] = MappingProxyType({
+    'pdf': 'application/pdf',
+    'txt': 'text/plain',
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'xls': 'application/vnd.ms-excel',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+})
+DEFAULT_MIME_TYPE = 'application/octet-stream'
+
+
+def get_mime_type(filename: str) -> str:
+    """
+    Get the MIME type based on file extension
+    
+    Args:
+        filename (str): Name or path of the file
+        
+    Returns:
+        str: MIME type, or DEFAULT_MIME_TYPE for unknown extensions
+    """
+    extension = filename.rpartition('.')[2].lower()
+    return MIME_TYPES.get(extension, DEFAULT_MIME_TYPE)
@@ -6,6 +6,15 @@ from api_upload import CloudStorageUpload
 from gemini import GeminiAPI
 import os
 import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
 
 # Initialize page config and title
 st.set_page_config(page_title="📄 Document QA", layout="wide")
@@ -29,6 +38,23 @@ def init_google_cloud():
         st.error(f"Error initializing Google Cloud credentials: {e}")
         return None
 
+# Seconds to reuse a file listing before querying GCS again
+FILE_LIST_TTL = 60
+
+# Number of files uploaded to GCS at the same time
+MAX_UPLOAD_WORKERS = 8
+
+def get_available_files():
+    """Return the cached file listing, refreshing it once it is older than FILE_LIST_TTL"""
+    if time.time() - st.session_state.files_fetched_at > FILE_LIST_TTL:
+        st.session_state.available_files = st.session_state.gemini_api.list_available_files()
+        st.session_state.files_fetched_at = time.time()
+    return st.session_state.available_files
+
+def invalidate_file_list():
+    """Force the next get_available_files call to re-list the bucket"""
+    st.session_state.files_fetched_at = 0
+
 # Setup configuration
 credentials = init_google_cloud()
 if not credentials:
@@ -43,6 +69,12 @@ if 'uploader' not in st.session_state:
     st.session_state.uploader = None
 if 'deleter' not in st.session_state:
     st.session_state.deleter = None
+if 'api_creds' not in st.session_state:
+    st.session_state.api_creds = None
+if 'available_files' not in st.session_state:
+    st.session_state.available_files = []
+if 'files_fetched_at' not in st.session_state:
+    st.session_state.files_fetched_at = 0
 
 # Setup sidebar for configuration
 with st.sidebar:
@@ -51,18 +83,29 @@ with st.sidebar:
     gcs_bucket = st.text_input("GCS Bucket Name")
     base_path = st.text_input("Base Storage Path", value="documents")
 
-    if gemini_api_key and gcs_bucket:
-        try:
-            st.session_state.gemini_api = GeminiAPI()
-            st.session_state.uploader = CloudStorageUpload(gcs_bucket, base_path)
-            st.session_state.deleter = CloudStorageDelete(gcs_bucket, base_path)
-            st.success("APIs configured successfully!")
-        except Exception as e:
-            st.error(f"Error configuring APIs: {str(e)}")
+    # Clients are only rebuilt on an explicit apply with changed settings,
+    # since each one sets up its own authenticated storage client
+    if st.button("Apply Configuration", disabled=not (gemini_api_key and gcs_bucket)):
+        api_creds = (gemini_api_key, gcs_bucket, base_path)
+        if api_creds == st.session_state.api_creds:
+            st.info("Configuration unchanged.")
+        else:
+            try:
+                gemini_api = GeminiAPI()
+                uploader = CloudStorageUpload(gcs_bucket, base_path)
+                deleter = CloudStorageDelete(gcs_bucket, base_path)
+                st.session_state.gemini_api = gemini_api
+                st.session_state.uploader = uploader
+                st.session_state.deleter = deleter
+                st.session_state.api_creds = api_creds
+                invalidate_file_list()
+                st.success("APIs configured successfully!")
+            except Exception as e:
+                st.error(f"Error configuring APIs: {str(e)}")
 
 # Main content area
 if not st.session_state.gemini_api:
-    st.info("Please configure your API credentials in the sidebar to continue.", icon="🔑")
+    st.info("Please configure your API credentials in the sidebar and apply them to continue.", icon="🔑")
 else:
     # Create tabs for different functionalities
     tab1, tab2, tab3 = st.tabs(["Ask Questions", "Upload Documents", "Manage Files"])
@@ -72,7 +115,7 @@ else:
         st.header("Ask Questions About Documents")
         
         # Get available files
-        available_files = st.session_state.gemini_api.list_available_files()
+        available_files = get_available_files()
         selected_files = st.multiselect(
             "Select documents to query",
             options=[f["full_path"] for f in available_files],
@@ -103,13 +146,19 @@ else:
         )
 
         if uploaded_files and st.button("Upload Selected Files"):
-            for file in uploaded_files:
-                with st.spinner(f"Uploading {file.name}..."):
-                    success, message = st.session_state.uploader.upload_file(file)
+            # Upload in worker threads; Streamlit calls stay on the script thread
+            uploader = st.session_state.uploader
+            progress = st.progress(0.0, text=f"Uploading {len(uploaded_files)} files...")
+            with ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as executor:
+                futures = {executor.submit(uploader.upload_file, file): file for file in uploaded_files}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    success, message = future.result()
                     if success:
                         st.success(message)
                     else:
-                        st.error(message)
+                        st.error(f"{futures[future].name}: {message}")
+                    progress.progress(done / len(futures), text=f"Uploaded {done} of {len(futures)} files")
+            invalidate_file_list()
 
     # Tab 3: Manage Files
     with tab3:
@@ -125,6 +174,7 @@ else:
             if files_to_delete and st.button("Delete Selected Files"):
                 with st.spinner("Deleting files..."):
                     results = st.session_state.deleter.delete_multiple_files(files_to_delete)
+                    invalidate_file_list()
                     for file_path, success, message in results:
                         if success:
                             st.success(f"Deleted: {file_path.split('/')[-1]}")